@@ -5,14 +5,160 @@ This module handles camera operations including live capture and synthetic
 test image generation for demonstration purposes.
 """
 
+import functools
+
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
+import threading
 import time
 
 from config import Config
 
 
+_PART_MARGIN = 40
+_SPATTER_RADII = (1, 2, 3)
+
+
+def _disk_offsets(radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the (dy, dx) pixel offsets cv2.circle fills for a filled disk.
+    
+    Args:
+        radius: Disk radius in pixels
+        
+    Returns:
+        Tuple of row and column offset arrays relative to the disk centre
+    """
+    stamp = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.uint8)
+    cv2.circle(stamp, (radius, radius), radius, 255, -1)
+    dy, dx = np.nonzero(stamp)
+    return dy - radius, dx - radius
+
+
+# Precomputed spatter dot footprints, keyed by radius
+_SPATTER_STAMPS = {radius: _disk_offsets(radius) for radius in _SPATTER_RADII}
+
+
+def _part_rect(size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Return the (x, y, width, height) of the synthetic part for an image size."""
+    width, height = size
+    return (
+        _PART_MARGIN, 
+        _PART_MARGIN, 
+        width - _PART_MARGIN * 2, 
+        height - _PART_MARGIN * 2
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _build_template(size: Tuple[int, int], part_missing: bool, no_welding: bool) -> np.ndarray:
+    """
+    Render the spatter-free synthetic part once per variant.
+    
+    Args:
+        size: Image dimensions (width, height)
+        part_missing: Whether to simulate missing part
+        no_welding: Whether to simulate missing welds
+        
+    Returns:
+        Read-only template image; callers must copy before drawing on it
+    """
+    width, height = size
+    
+    # Create white background
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    
+    # If part is missing, return background only
+    if part_missing:
+        img.flags.writeable = False
+        return img
+    
+    # Draw light grey part rectangle
+    part_rect = _part_rect(size)
+    cv2.rectangle(
+        img, 
+        (part_rect[0], part_rect[1]),
+        (part_rect[0] + part_rect[2], part_rect[1] + part_rect[3]),
+        (200, 200, 200), 
+        -1
+    )
+    
+    # Define hole positions relative to part rectangle
+    hole_radius = 20
+    hole_offsets = [
+        (int(0.25 * part_rect[2]), int(0.3 * part_rect[3])),  # Top-left
+        (int(0.75 * part_rect[2]), int(0.3 * part_rect[3])),  # Top-right
+        (int(0.25 * part_rect[2]), int(0.7 * part_rect[3])),  # Bottom-left
+        (int(0.75 * part_rect[2]), int(0.7 * part_rect[3])),  # Bottom-right
+    ]
+    
+    # Draw holes (black circles)
+    for idx, (dx, dy) in enumerate(hole_offsets):
+        center = (part_rect[0] + dx, part_rect[1] + dy)
+        cv2.circle(img, center, hole_radius, (0, 0, 0), -1)
+    
+    # Draw weld seams if required
+    if not no_welding:
+        weld_thickness = 5
+        
+        # Calculate weld seam endpoints
+        # Top horizontal seam
+        p1 = (
+            part_rect[0] + hole_offsets[0][0] + hole_radius,
+            part_rect[1] + hole_offsets[0][1]
+        )
+        p2 = (
+            part_rect[0] + hole_offsets[1][0] - hole_radius,
+            part_rect[1] + hole_offsets[1][1]
+        )
+        cv2.line(img, p1, p2, (0, 0, 0), weld_thickness)
+        
+        # Bottom horizontal seam
+        p3 = (
+            part_rect[0] + hole_offsets[2][0] + hole_radius,
+            part_rect[1] + hole_offsets[2][1]
+        )
+        p4 = (
+            part_rect[0] + hole_offsets[3][0] - hole_radius,
+            part_rect[1] + hole_offsets[3][1]
+        )
+        cv2.line(img, p3, p4, (0, 0, 0), weld_thickness)
+        
+        # Left vertical seam
+        p5 = (
+            part_rect[0] + hole_offsets[0][0],
+            part_rect[1] + hole_offsets[0][1] + hole_radius
+        )
+        p6 = (
+            part_rect[0] + hole_offsets[2][0],
+            part_rect[1] + hole_offsets[2][1] - hole_radius
+        )
+        cv2.line(img, p5, p6, (0, 0, 0), weld_thickness)
+        
+        # Right vertical seam
+        p7 = (
+            part_rect[0] + hole_offsets[1][0],
+            part_rect[1] + hole_offsets[1][1] + hole_radius
+        )
+        p8 = (
+            part_rect[0] + hole_offsets[3][0],
+            part_rect[1] + hole_offsets[3][1] - hole_radius
+        )
+        cv2.line(img, p7, p8, (0, 0, 0), weld_thickness)
+    
+    img.flags.writeable = False
+    return img
+
+
+# Templates for the default test image size, rendered once at import
+_TEMPLATES = {
+    (part_missing, no_welding): _build_template(Config.TEST_IMAGE_SIZE, part_missing, no_welding)
+    for part_missing in (False, True)
+    for no_welding in (False, True)
+}
+
+
 class CameraController:
     """
     Controller for camera operations and test image generation.
@@ -21,24 +167,39 @@ class CameraController:
     for testing and demonstration purposes.
     """
     
-    def __init__(self, camera_id: int = 0):
+    def __init__(self, camera_id: int = 0, seed: Optional[int] = None):
         """
         Initialize camera controller.
         
         Args:
             camera_id: Camera device ID (0 for default camera)
+            seed: Seed for synthetic spatter generation (None for random)
         """
         self.camera_id = camera_id
         self.cap = None
         self.is_connected = False
         
+        # Random generator for test images, created once per controller
+        self._rng = np.random.default_rng(seed)
+        
+        # Most recent frame published by the background reader thread
+        self._latest: Optional[np.ndarray] = None
+        self._latest_time = 0.0  # time.monotonic() when _latest was grabbed
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Event()
+        self._stop = threading.Event()
+        self._reader_thread: Optional[threading.Thread] = None
+        
     def connect(self) -> bool:
         """
-        Connect to camera device.
+        Connect to camera device and start the background frame reader.
         
         Returns:
             True if connection successful, False otherwise
         """
+        if self.is_connected:
+            return True
+        
         try:
             self.cap = cv2.VideoCapture(self.camera_id)
             if self.cap.isOpened():
@@ -47,7 +208,16 @@ class CameraController:
                 self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.CAMERA_HEIGHT)
                 self.cap.set(cv2.CAP_PROP_FPS, Config.CAMERA_FPS)
                 
+                # Keep the backend queue short so captures return fresh frames
+                if not self.cap.set(cv2.CAP_PROP_BUFFERSIZE, Config.CAMERA_BUFFER_SIZE):
+                    print("Camera backend ignored buffer size setting")
+                
+                fourcc = cv2.VideoWriter_fourcc(*Config.CAMERA_FOURCC)
+                if not self.cap.set(cv2.CAP_PROP_FOURCC, fourcc):
+                    print(f"Camera backend ignored {Config.CAMERA_FOURCC} pixel format")
+                
                 self.is_connected = True
+                self._start_reader()
                 return True
         except Exception as e:
             print(f"Failed to connect to camera: {e}")
@@ -55,36 +225,156 @@ class CameraController:
         return False
     
     def disconnect(self) -> None:
-        """Disconnect from camera device."""
+        """
+        Stop the frame reader and disconnect from camera device.
+        
+        The reader thread references the controller, so the device is only
+        released by calling this explicitly, not by garbage collection.
+        """
+        if not self._stop_reader():
+            # Releasing the capture while the reader is inside grab() is
+            # unsafe, so keep the device open; a later call can retry
+            print("Camera reader did not stop; device not released")
+            return
         if self.cap is not None:
             self.cap.release()
             self.is_connected = False
     
-    def capture_image(self) -> Optional[np.ndarray]:
+    def _start_reader(self) -> None:
+        """Start the daemon thread that keeps only the newest frame."""
+        self._stop.clear()
+        self._frame_ready.clear()
+        self._latest = None
+        self._reader_thread = threading.Thread(
+            target=self._reader, name="CameraReader", daemon=True
+        )
+        self._reader_thread.start()
+    
+    def _stop_reader(self) -> bool:
+        """
+        Signal the frame reader to stop and wait for it to exit.
+        
+        Returns:
+            True if no reader thread is running any more
+        """
+        self._stop.set()
+        if self._reader_thread is not None:
+            self._reader_thread.join(timeout=Config.CAMERA_TIMEOUT)
+            if self._reader_thread.is_alive():
+                return False
+            self._reader_thread = None
+        return True
+    
+    def _reader(self) -> None:
+        """Continuously grab frames, publishing only the most recent one."""
+        last_frame = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                ret, frame = self._read_latest_frame()
+            except Exception as e:
+                print(f"Error reading camera frame: {e}")
+                ret, frame = False, None
+            
+            if not ret:
+                # Withdraw the last frame once the camera has stopped
+                # delivering for longer than a capture may wait
+                if time.monotonic() - last_frame > Config.CAMERA_CAPTURE_TIMEOUT:
+                    with self._lock:
+                        self._frame_ready.clear()
+                        self._latest = None
+                # Avoid spinning on a camera that stopped delivering frames
+                time.sleep(1.0 / Config.CAMERA_FPS)
+                continue
+            last_frame = time.monotonic()
+            
+            with self._lock:
+                self._latest = frame
+                self._latest_time = last_frame
+                self._frame_ready.set()
+    
+    def _get_latest_frame(self, with_gray: bool = False):
+        """
+        Return a copy of the newest frame published by the reader thread.
+        
+        Args:
+            with_gray: Also return the frame's grayscale plane
+            
+        Returns:
+            Latest frame, or (frame, gray) if with_gray is set; None if no
+            frame arrived within the capture timeout or the newest one is
+            older than that (e.g. the reader is stuck in a hung driver)
+        """
+        if not self._frame_ready.wait(timeout=Config.CAMERA_CAPTURE_TIMEOUT):
+            return None
+        
+        with self._lock:
+            if (self._latest is None
+                    or time.monotonic() - self._latest_time > Config.CAMERA_CAPTURE_TIMEOUT):
+                return None
+            frame = self._latest.copy()
+            if with_gray:
+                # Converted only for frames that are actually inspected,
+                # not for every frame the reader grabs
+                gray = frame.copy() if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                return frame, gray
+            return frame
+    
+    def capture_image(
+        self, with_gray: bool = False
+    ) -> Union[Optional[np.ndarray], Tuple[Optional[np.ndarray], Optional[np.ndarray]]]:
         """
         Capture a single image from camera.
         
+        Returns the newest frame held by the background reader, so the
+        call does not block on the camera frame period.
+        
+        Args:
+            with_gray: Also return the grayscale plane of the image
+            
         Returns:
-            Captured image as numpy array, None if capture failed
+            Captured image as numpy array, None if capture failed; a tuple
+            of (image, gray) if with_gray is set
         """
-        if not self.is_connected:
-            if not self.connect():
-                # If live camera not available, generate test image
-                return self.generate_test_part()
+        if self.is_connected or self.connect():
+            latest = self._get_latest_frame(with_gray)
+            if latest is not None:
+                return latest
+            
+            print("Error capturing image: no frame received from camera")
         
-        try:
-            ret, frame = self.cap.read()
-            if ret:
-                return frame
-        except Exception as e:
-            print(f"Error capturing image: {e}")
+        # If live camera not available, generate test image
+        frame = self.generate_test_part()
+        if with_gray:
+            return frame, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+    
+    def _read_latest_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Drain stale buffered frames and decode only the newest one.
+        
+        Frames are grabbed without decoding until the backend queue is
+        empty or the flush budget runs out (a grab that blocks means the
+        queue was already empty and the frame is fresh).
+        
+        Returns:
+            Tuple of (success flag, decoded frame)
+        """
+        start = time.monotonic()
+        grabbed = False
+        for _ in range(Config.CAMERA_BUFFER_DEPTH):
+            if not self.cap.grab():
+                break
+            grabbed = True
+            if time.monotonic() - start > Config.CAMERA_FLUSH_BUDGET:
+                break
         
-        # Fallback to test image if live capture fails
-        return self.generate_test_part()
+        if not grabbed:
+            return False, None
+        return self.cap.retrieve()
     
     def generate_test_part(
         self,
-        size: Tuple[int, int] = (600, 400),
+        size: Tuple[int, int] = Config.TEST_IMAGE_SIZE,
         part_missing: bool = False,
         no_welding: bool = False,
         spatter: bool = False,
@@ -101,111 +391,38 @@ class CameraController:
         Returns:
             Generated test image
         """
-        width, height = size
+        # Copy the prebuilt clean part; only the spatter is drawn per call
+        size = tuple(size)
+        if size == Config.TEST_IMAGE_SIZE:
+            template = _TEMPLATES[(part_missing, no_welding)]
+        else:
+            template = _build_template(size, part_missing, no_welding)
+        img = template.copy()
         
-        # Create white background
-        img = np.ones((height, width, 3), dtype=np.uint8) * 255
-        
-        # If part is missing, return background only
-        if part_missing:
-            return img
-        
-        # Draw light grey part rectangle
-        part_margin = 40
-        part_rect = (
-            part_margin, 
-            part_margin, 
-            width - part_margin * 2, 
-            height - part_margin * 2
-        )
-        cv2.rectangle(
-            img, 
-            (part_rect[0], part_rect[1]),
-            (part_rect[0] + part_rect[2], part_rect[1] + part_rect[3]),
-            (200, 200, 200), 
-            -1
-        )
-        
-        # Define hole positions relative to part rectangle
-        hole_radius = 20
-        hole_offsets = [
-            (int(0.25 * part_rect[2]), int(0.3 * part_rect[3])),  # Top-left
-            (int(0.75 * part_rect[2]), int(0.3 * part_rect[3])),  # Top-right
-            (int(0.25 * part_rect[2]), int(0.7 * part_rect[3])),  # Bottom-left
-            (int(0.75 * part_rect[2]), int(0.7 * part_rect[3])),  # Bottom-right
-        ]
-        
-        # Draw holes (black circles)
-        for idx, (dx, dy) in enumerate(hole_offsets):
-            center = (part_rect[0] + dx, part_rect[1] + dy)
-            cv2.circle(img, center, hole_radius, (0, 0, 0), -1)
-        
-        # Draw weld seams if required
-        if not no_welding:
-            weld_thickness = 5
-            
-            # Calculate weld seam endpoints
-            # Top horizontal seam
-            p1 = (
-                part_rect[0] + hole_offsets[0][0] + hole_radius,
-                part_rect[1] + hole_offsets[0][1]
-            )
-            p2 = (
-                part_rect[0] + hole_offsets[1][0] - hole_radius,
-                part_rect[1] + hole_offsets[1][1]
-            )
-            cv2.line(img, p1, p2, (0, 0, 0), weld_thickness)
-            
-            # Bottom horizontal seam
-            p3 = (
-                part_rect[0] + hole_offsets[2][0] + hole_radius,
-                part_rect[1] + hole_offsets[2][1]
-            )
-            p4 = (
-                part_rect[0] + hole_offsets[3][0] - hole_radius,
-                part_rect[1] + hole_offsets[3][1]
-            )
-            cv2.line(img, p3, p4, (0, 0, 0), weld_thickness)
-            
-            # Left vertical seam
-            p5 = (
-                part_rect[0] + hole_offsets[0][0],
-                part_rect[1] + hole_offsets[0][1] + hole_radius
-            )
-            p6 = (
-                part_rect[0] + hole_offsets[2][0],
-                part_rect[1] + hole_offsets[2][1] - hole_radius
-            )
-            cv2.line(img, p5, p6, (0, 0, 0), weld_thickness)
+        # Add weld spatter (random black dots) if requested
+        if spatter and not part_missing:
+            part_rect = _part_rect(size)
+            rng = self._rng
+            spatter_count = int(rng.integers(20, 80))  # Variable spatter amount
             
-            # Right vertical seam
-            p7 = (
-                part_rect[0] + hole_offsets[1][0],
-                part_rect[1] + hole_offsets[1][1] + hole_radius
+            # Random positions within part area
+            xs = rng.integers(
+                part_rect[0] + 10, 
+                part_rect[0] + part_rect[2] - 10,
+                spatter_count
             )
-            p8 = (
-                part_rect[0] + hole_offsets[3][0],
-                part_rect[1] + hole_offsets[3][1] - hole_radius
+            ys = rng.integers(
+                part_rect[1] + 10, 
+                part_rect[1] + part_rect[3] - 10,
+                spatter_count
             )
-            cv2.line(img, p7, p8, (0, 0, 0), weld_thickness)
-        
-        # Add weld spatter (random black dots) if requested
-        if spatter:
-            rng = np.random.default_rng(int(time.time()))
-            spatter_count = rng.integers(20, 80)  # Variable spatter amount
+            radii = rng.integers(1, 4, spatter_count)
             
-            for _ in range(spatter_count):
-                # Random position within part area
-                x = rng.integers(
-                    part_rect[0] + 10, 
-                    part_rect[0] + part_rect[2] - 10
-                )
-                y = rng.integers(
-                    part_rect[1] + 10, 
-                    part_rect[1] + part_rect[3] - 10
-                )
-                radius = rng.integers(1, 4)
-                cv2.circle(img, (int(x), int(y)), int(radius), (0, 0, 0), -1)
+            # Stamp all dots of the same radius with one fancy-index store
+            for radius, (dy, dx) in _SPATTER_STAMPS.items():
+                selected = radii == radius
+                if selected.any():
+                    img[ys[selected, None] + dy, xs[selected, None] + dx] = 0
         
         return img
     
@@ -221,8 +438,8 @@ class CameraController:
         print("Camera preview started. Press 'q' to quit, 's' to save frame.")
         
         while True:
-            ret, frame = self.cap.read()
-            if not ret:
+            frame = self._get_latest_frame()
+            if frame is None:
                 print("Failed to capture frame")
                 break
             
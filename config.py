@@ -7,6 +7,8 @@ used throughout the inspection application.
 
 import os
 
+import cv2
+
 
 class Config:
     """
@@ -26,10 +28,15 @@ class Config:
     CAMERA_HEIGHT = 1080
     CAMERA_FPS = 30
     CAMERA_TIMEOUT = 5.0  # seconds
+    CAMERA_BUFFER_SIZE = 1  # Frames queued by the capture backend
+    CAMERA_FOURCC = "MJPG"  # Requested pixel format (compressed to cut decode cost)
+    CAMERA_BUFFER_DEPTH = 4  # Frames to drain when the backend ignores the buffer size
+    CAMERA_FLUSH_BUDGET = 0.005  # seconds spent draining stale frames per capture
     
     # === Image Processing Parameters ===
     # Part detection
     PART_DETECTION_THRESHOLD = 240.0  # Mean pixel value threshold for part presence
+    PART_DETECTION_STRIDE = 8  # Sample every Nth pixel per axis when estimating the mean
     
     # Hole detection
     EXPECTED_HOLE_COUNT = 4
@@ -38,6 +45,23 @@ class Config:
     HOLE_DETECTION_PARAM1 = 50  # Upper threshold for edge detection
     HOLE_DETECTION_PARAM2 = 20  # Accumulator threshold for center detection
     MIN_DISTANCE_BETWEEN_HOLES = 50  # Minimum distance between hole centers
+    # Run the Hough transform on a 2x downscaled image (pyrDown). Quarters the
+    # accumulator work, but biases diameters low: the synthetic part's 40 px
+    # holes measure 38.4 px against 39-41 px at full resolution. Off by
+    # default so measurements match the full-resolution transform.
+    HOLE_DETECTION_PYRDOWN = False
+    HOLE_DETECTION_PARAM2_PYRDOWN = 14  # Accumulator threshold on the downscaled image
+    HOLE_DETECTION_DP = 1.0  # Accumulator resolution ratio (2.0 halves the grid)
+    # Search holes in windows around their expected centres (fractions of the
+    # image width/height) first; the full frame is searched if any is missed.
+    # EXPECTED_HOLE_CENTERS and HOLE_ROI_HALF_SIZE are fitted to the synthetic
+    # test part geometry and must be re-measured for each real fixture.
+    HOLE_ROI_SEARCH = True
+    EXPECTED_HOLE_CENTERS = (
+        (0.283, 0.34), (0.717, 0.34),  # Top-left, top-right
+        (0.283, 0.66), (0.717, 0.66),  # Bottom-left, bottom-right
+    )
+    HOLE_ROI_HALF_SIZE = 80  # pixels (2 x MAX_HOLE_RADIUS)
     
     # Spatter detection
     MAX_SPATTER_COUNT = 5  # Maximum allowed spatter instances
@@ -58,6 +82,7 @@ class Config:
     
     # File naming
     IMAGE_FORMAT = "jpg"
+    JPEG_QUALITY = 95  # Encoder quality for saved images (OpenCV default)
     CSV_FILENAME_TEMPLATE = "{order_number}.csv"
     IMAGE_FILENAME_TEMPLATE = "{status}_{order_number}_{part_number}Count{counter}_CAM{cam_id}.{format}"
     
@@ -115,6 +140,9 @@ class Config:
     }
     
     # === Performance Settings ===
+    # Run detection through OpenCL (cv2.UMat) when a device is available
+    USE_OPENCL = True
+    
     # Processing timeouts
     IMAGE_PROCESSING_TIMEOUT = 10.0  # seconds
     CAMERA_CAPTURE_TIMEOUT = 5.0     # seconds
@@ -164,6 +192,11 @@ class Config:
         cls.PART_DETECTION_THRESHOLD = float(os.getenv('INSPECTION_PART_THRESHOLD', cls.PART_DETECTION_THRESHOLD))
         cls.MAX_SPATTER_COUNT = int(os.getenv('INSPECTION_MAX_SPATTER', cls.MAX_SPATTER_COUNT))
         
+        # Performance
+        cls.USE_OPENCL = os.getenv('INSPECTION_USE_OPENCL', str(cls.USE_OPENCL)).lower() == 'true'
+        # Applied here so a reload takes effect regardless of import order
+        cv2.ocl.setUseOpenCL(cls.USE_OPENCL)
+        
         # Directories
         cls.DEFAULT_OUTPUT_DIR = os.getenv('INSPECTION_OUTPUT_DIR', cls.DEFAULT_OUTPUT_DIR)
         cls.LOG_DIR = os.getenv('INSPECTION_LOG_DIR', cls.LOG_DIR)
@@ -19,6 +19,11 @@ class CameraCalibrator:
         self.camera_matrix: Optional[np.ndarray] = None
         self.distortion_coeffs: Optional[np.ndarray] = None
         self.calibrated = False
+        
+        # Undistortion lookup tables, rebuilt when the image size changes
+        self._map1: Optional[np.ndarray] = None
+        self._map2: Optional[np.ndarray] = None
+        self._map_size: Optional[Tuple[int, int]] = None
     
     def calibrate_from_chessboard(self, images: List[np.ndarray], 
                                  pattern_size: Tuple[int, int] = (9, 6),
@@ -67,14 +72,31 @@ class CameraCalibrator:
                 self.camera_matrix = mtx
                 self.distortion_coeffs = dist
                 self.calibrated = True
+                self._init_undistort_maps(gray.shape[::-1])
                 return True
         
         return False
     
+    def _init_undistort_maps(self, size: Tuple[int, int]) -> None:
+        """
+        Precompute the undistortion remap tables for an image size.
+        
+        Args:
+            size: Image dimensions (width, height)
+        """
+        self._map1, self._map2 = cv2.initUndistortRectifyMap(
+            self.camera_matrix, self.distortion_coeffs, None,
+            self.camera_matrix, size, cv2.CV_16SC2
+        )
+        self._map_size = size
+    
     def undistort_image(self, img: np.ndarray) -> np.ndarray:
         """
         Correct image distortion using calibration parameters.
         
+        Uses remap tables precomputed from the calibration, so each call is
+        a single lookup pass instead of re-evaluating the distortion model.
+        
         Args:
             img: Input distorted image
             
@@ -84,7 +106,11 @@ class CameraCalibrator:
         if not self.calibrated:
             return img
         
-        return cv2.undistort(img, self.camera_matrix, self.distortion_coeffs)
+        size = (img.shape[1], img.shape[0])
+        if size != self._map_size:
+            self._init_undistort_maps(size)
+        
+        return cv2.remap(img, self._map1, self._map2, cv2.INTER_LINEAR)
     
     def pixels_to_mm(self, pixel_distance: float, reference_distance_mm: float, 
                      reference_distance_px: float) -> float:
@@ -138,6 +164,7 @@ class CameraCalibrator:
             self.camera_matrix = data['camera_matrix']
             self.distortion_coeffs = data['distortion_coeffs']
             self.calibrated = True
+            self._map_size = None  # Maps are rebuilt on the next undistort
             return True
         except Exception:
             return False
\ No newline at end of file
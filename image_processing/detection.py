@@ -6,53 +6,200 @@ measuring hole diameters, measuring weld seam lengths, and detecting
 weld spatter in metal parts.
 """
 
+from dataclasses import dataclass
+
 import cv2
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+
+from config import Config
+
+
+# Structuring element for the spatter opening, allocated once. A single 5x5
+# opening equals two iterations of a 3x3 opening for a rectangular element.
+_SPATTER_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+# Hole pairs joined by the top, bottom, left and right seams, as indices
+# into the TL, TR, BL, BR arrangement
+_SEAM_FIRST = np.array([0, 2, 0, 1])
+_SEAM_SECOND = np.array([1, 3, 2, 3])
+
+# Font used for all annotation labels
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Pixel-level OpenCV work is dispatched to OpenCL through cv2.UMat when
+# Config.USE_OPENCL is set (load_from_environment applies it to cv2.ocl)
+_OPENCL_AVAILABLE = cv2.ocl.haveOpenCL()
+
+
+def _to_device(img: np.ndarray):
+    """Wrap an image in a cv2.UMat when the OpenCL path is enabled."""
+    if Config.USE_OPENCL and _OPENCL_AVAILABLE:
+        return cv2.UMat(img)
+    return img
+
+
+def _to_host(arr):
+    """Download a cv2.UMat result back to a numpy array (None if empty)."""
+    if isinstance(arr, cv2.UMat):
+        return arr.get()
+    return arr
 
 
 def detect_part_presence(gray: np.ndarray, mean_threshold: float = 240.0) -> bool:
     """
     Return True if a part (grey region) is present, otherwise False.
     
+    The mean is estimated on a strided view of the image, which reads only
+    a fraction of the pixels without copying.
+    
     Args:
-        gray: Grayscale input image
+        gray: Single-channel input image (grayscale or one colour channel)
         mean_threshold: Threshold for mean pixel value to determine part presence
         
     Returns:
         True if part is detected, False otherwise
     """
-    mean_val = float(gray.mean())
+    stride = Config.PART_DETECTION_STRIDE
+    # cv2.mean sums uint8 pixels with SIMD integer accumulators
+    mean_val = cv2.mean(gray[::stride, ::stride])[0]
     return mean_val < mean_threshold
 
 
-def detect_holes(gray: np.ndarray) -> List[Tuple[Tuple[int, int], float, float]]:
+@dataclass(frozen=True, eq=False)
+class Holes:
     """
-    Detect circular holes via the Hough Circle Transform.
+    Detected holes stored as structure-of-arrays.
+    
+    Attributes:
+        centroids: float32 array of shape (N, 2) with (cx, cy) rows
+        widths: float32 array of shape (N,) with hole widths
+        heights: float32 array of shape (N,) with hole heights
+    """
+    centroids: np.ndarray
+    widths: np.ndarray
+    heights: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.widths)
+    
+    def take(self, order: np.ndarray) -> "Holes":
+        """
+        Select and reorder holes.
+        
+        Args:
+            order: Integer index array (or slice) applied to every field
+            
+        Returns:
+            New Holes with the selected entries
+        """
+        return Holes(self.centroids[order], self.widths[order], self.heights[order])
+
+
+def _hough_circles(gray: np.ndarray, min_dist: float) -> Optional[np.ndarray]:
+    """
+    Run the Hough Circle Transform configured for hole detection.
+    
+    When Config.HOLE_DETECTION_PYRDOWN is set, the transform runs on a 2x
+    downscaled image and the detected circles are scaled back up.
     
     Args:
-        gray: Grayscale input image
+        gray: Grayscale input image or region
+        min_dist: Minimum distance between circle centres in input pixels
         
     Returns:
-        List of tuples containing ((x, y), width, height) for each detected hole
+        float32 array of shape (N, 3) with (x, y, radius) rows ordered by
+        accumulator votes, None if no circle was found
     """
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    src = _to_device(gray)
+    if Config.HOLE_DETECTION_PYRDOWN:
+        # pyrDown already applies a 5x5 Gaussian, so no separate blur pass
+        src = cv2.pyrDown(src)
+        scale = 2.0
+        param2 = Config.HOLE_DETECTION_PARAM2_PYRDOWN
+    else:
+        src = cv2.GaussianBlur(src, (5, 5), 0)
+        scale = 1.0
+        param2 = Config.HOLE_DETECTION_PARAM2
+    
     circles = cv2.HoughCircles(
-        blurred, cv2.HOUGH_GRADIENT,
-        dp=1.0, minDist=50,
-        param1=50, param2=20,
-        minRadius=10, maxRadius=40
+        src, cv2.HOUGH_GRADIENT,
+        dp=Config.HOLE_DETECTION_DP,
+        minDist=min_dist / scale,
+        param1=Config.HOLE_DETECTION_PARAM1, param2=param2,
+        minRadius=int(Config.MIN_HOLE_RADIUS / scale),
+        maxRadius=int(Config.MAX_HOLE_RADIUS / scale)
     )
+    circles = _to_host(circles)
+    
+    if circles is None:
+        return None
+    return circles[0] * scale
+
+
+def _detect_holes_in_rois(gray: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Look for one hole in a small window around each expected hole centre.
+    
+    With pyrDown enabled, window origins and sizes are snapped to even
+    pixels so each window's downscaled grid lines up with the full frame's
+    and a hole measures the same wherever its window starts.
+    
+    Args:
+        gray: Grayscale input image
+        
+    Returns:
+        float32 array of shape (N, 3) with (x, y, radius) rows in image
+        coordinates, None if any window has no circle
+    """
+    height, width = gray.shape[:2]
+    pad = Config.HOLE_ROI_HALF_SIZE
+    align = 2 if Config.HOLE_DETECTION_PYRDOWN else 1
+    found = np.empty((len(Config.EXPECTED_HOLE_CENTERS), 3), dtype=np.float32)
+    
+    for idx, (fx, fy) in enumerate(Config.EXPECTED_HOLE_CENTERS):
+        x, y = int(fx * width), int(fy * height)
+        x0 = max(0, x - pad) // align * align
+        y0 = max(0, y - pad) // align * align
+        x1 = x0 + (min(width, x + pad) - x0) // align * align
+        y1 = y0 + (min(height, y + pad) - y0) // align * align
+        roi = gray[y0:y1, x0:x1]
+        
+        # A window holds a single hole, so keep only the strongest circle
+        circles = _hough_circles(roi, min_dist=2 * pad)
+        if circles is None:
+            return None
+        found[idx] = circles[0]
+        found[idx, 0] += x0
+        found[idx, 1] += y0
     
-    holes: List[Tuple[Tuple[int, int], float, float]] = []
-    if circles is not None:
-        circles = np.uint16(np.around(circles))
-        for circle in circles[0, :]:
-            x, y, r = circle
-            diameter = float(r * 2)
-            holes.append(((int(x), int(y)), diameter, diameter))
+    return found
+
+
+def detect_holes(gray: np.ndarray) -> Holes:
+    """
+    Detect circular holes via the Hough Circle Transform.
+    
+    With Config.HOLE_ROI_SEARCH set, the transform first runs only on small
+    windows around Config.EXPECTED_HOLE_CENTERS and falls back to the full
+    frame if any expected hole is not found there.
+    
+    Args:
+        gray: Grayscale input image
+        
+    Returns:
+        Holes with one entry per detected hole
+    """
+    circles = _detect_holes_in_rois(gray) if Config.HOLE_ROI_SEARCH else None
+    if circles is None:
+        circles = _hough_circles(gray, min_dist=Config.MIN_DISTANCE_BETWEEN_HOLES)
+    
+    if circles is None:
+        circles = np.empty((0, 3), dtype=np.float32)
     
-    return holes
+    # Build each field in bulk; circular holes have equal width and height
+    widths = circles[:, 2] * 2.0
+    return Holes(np.rint(circles[:, :2]), widths, widths.copy())
 
 
 def detect_spatter(gray: np.ndarray) -> int:
@@ -65,27 +212,50 @@ def detect_spatter(gray: np.ndarray) -> int:
     Returns:
         Number of spatter instances detected
     """
-    _, thresh = cv2.threshold(gray, 220, 255, cv2.THRESH_BINARY_INV)
-    kernel = np.ones((3, 3), np.uint8)
-    cleaned = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
+    _, thresh = cv2.threshold(
+        _to_device(gray), Config.SPATTER_BINARY_THRESHOLD, 255, cv2.THRESH_BINARY_INV
+    )
+    cleaned = _to_host(cv2.morphologyEx(thresh, cv2.MORPH_OPEN, _SPATTER_KERNEL))
     
     contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    spatter_count = 0
     
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if 3 < area < 100:  # Filter by area to identify spatter
-            spatter_count += 1
-            
-    return spatter_count
+    # Gather all contour areas first, then filter them in one vectorized pass
+    areas = np.fromiter(map(cv2.contourArea, contours), dtype=np.float64, count=len(contours))
+    spatter = (areas > Config.MIN_SPATTER_AREA) & (areas < Config.MAX_SPATTER_AREA)
+    
+    return int(np.count_nonzero(spatter))
 
 
-def calculate_seam_lengths(holes: List[Tuple[Tuple[int, int], float, float]]) -> Tuple[float, float, float, float]:
+def arrange_holes(holes: Holes) -> np.ndarray:
+    """
+    Order the first four holes as top-left, top-right, bottom-left, bottom-right.
+    
+    Compute this once per frame and pass it to calculate_seam_lengths and
+    annotate_image so both use the same arrangement.
+    
+    Args:
+        holes: Detected holes, at least four
+        
+    Returns:
+        Read-only index array of shape (4,) in TL, TR, BL, BR order
+    """
+    cx, cy = holes.centroids[:, 0], holes.centroids[:, 1]
+    by_y = np.lexsort((cx, cy))
+    top_row = by_y[:2][np.argsort(cx[by_y[:2]], kind="stable")]
+    bottom_row = by_y[2:4][np.argsort(cx[by_y[2:4]], kind="stable")]
+    order = np.concatenate((top_row, bottom_row))
+    order.flags.writeable = False
+    return order
+
+
+def calculate_seam_lengths(holes: Holes,
+                           order: Optional[np.ndarray] = None) -> Tuple[float, float, float, float]:
     """
     Calculate weld seam lengths from hole positions.
     
     Args:
-        holes: List of detected holes with positions and diameters
+        holes: Detected holes
+        order: Arrangement from arrange_holes (computed if not given)
         
     Returns:
         Tuple of (top_length, bottom_length, left_length, right_length)
@@ -93,101 +263,92 @@ def calculate_seam_lengths(holes: List[Tuple[Tuple[int, int], float, float]]) ->
     if len(holes) < 4:
         return 0.0, 0.0, 0.0, 0.0
     
-    # Sort holes by position to identify top/bottom rows and left/right columns
-    holes_by_y = sorted(holes, key=lambda h: h[0][1])
-    top_row = sorted(holes_by_y[:2], key=lambda h: h[0][0])
-    bottom_row = sorted(holes_by_y[2:4], key=lambda h: h[0][0])
-    
-    # Calculate radii
-    rad_top_left = top_row[0][1] / 2.0
-    rad_top_right = top_row[1][1] / 2.0
-    rad_bot_left = bottom_row[0][1] / 2.0
-    rad_bot_right = bottom_row[1][1] / 2.0
+    if order is None:
+        order = arrange_holes(holes)
+    centres = holes.centroids[order].astype(np.float64)
+    radii = holes.widths[order].astype(np.float64) * 0.5
     
-    def distance(p1, p2):
-        return float(np.hypot(p2[0] - p1[0], p2[1] - p1[1]))
-    
-    # Calculate seam lengths (distance between hole centers minus radii)
-    len_top = distance(top_row[0][0], top_row[1][0]) - (rad_top_left + rad_top_right)
-    len_bottom = distance(bottom_row[0][0], bottom_row[1][0]) - (rad_bot_left + rad_bot_right)
-    len_left = distance(top_row[0][0], bottom_row[0][0]) - (rad_top_left + rad_bot_left)
-    len_right = distance(top_row[1][0], bottom_row[1][0]) - (rad_top_right + rad_bot_right)
+    # Seam length is the distance between hole centres minus both radii
+    delta = centres[_SEAM_SECOND] - centres[_SEAM_FIRST]
+    lengths = np.hypot(delta[:, 0], delta[:, 1]) - (radii[_SEAM_FIRST] + radii[_SEAM_SECOND])
+    len_top, len_bottom, len_left, len_right = lengths.tolist()
     
     return len_top, len_bottom, len_left, len_right
 
 
-def annotate_image(img: np.ndarray, holes: List[Tuple[Tuple[int, int], float, float]], 
+# Annotation deliberately stays on numpy arrays even with Config.USE_OPENCL:
+# OpenCV's drawing functions and imencode have no OpenCL kernels and map a
+# cv2.UMat back to host memory, so a UMat canvas would only add transfers.
+def annotate_image(img: np.ndarray, holes: Holes, 
                   seam_lengths: Tuple[float, float, float, float], 
-                  spatter_count: int, status: str) -> np.ndarray:
+                  spatter_count: int, status: str, inplace: bool = False,
+                  order: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Annotate image with measurement overlays and status indicators.
     
     Args:
         img: Input image to annotate
-        holes: List of detected holes
+        holes: Detected holes
         seam_lengths: Tuple of seam lengths (top, bottom, left, right)
         spatter_count: Number of detected spatter instances
         status: Overall status ("OK" or "NOK")
+        inplace: Draw directly on img instead of a copy (saves a full-frame
+            allocation when the caller no longer needs the raw image)
+        order: Arrangement from arrange_holes (computed if not given)
         
     Returns:
         Annotated image
     """
-    annotated = img.copy()
+    annotated = img if inplace else img.copy()
     
     # Draw holes with diameter labels
-    for hole in holes:
-        centre, width, _ = hole
+    for (cx, cy), width in zip(holes.centroids.tolist(), holes.widths.tolist()):
+        centre = (int(cx), int(cy))
         cv2.circle(annotated, centre, int(width/2), (0, 255, 0), 2)
         cv2.putText(
             annotated, f"D: {width:.2f}",
             (centre[0] - 40, centre[1] - 10),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1
+            _FONT, 0.5, (0, 255, 0), 1
         )
     
     # Draw seam measurements if we have enough holes
     if len(holes) >= 4:
         len_top, len_bottom, len_left, len_right = seam_lengths
         
-        holes_by_y = sorted(holes, key=lambda h: h[0][1])
-        top_row = sorted(holes_by_y[:2], key=lambda h: h[0][0])
-        bottom_row = sorted(holes_by_y[2:4], key=lambda h: h[0][0])
-        
-        rad_top_left = top_row[0][1] / 2.0
-        rad_top_right = top_row[1][1] / 2.0
-        rad_bot_left = bottom_row[0][1] / 2.0
-        rad_bot_right = bottom_row[1][1] / 2.0
+        if order is None:
+            order = arrange_holes(holes)
+        top_left, top_right, bot_left, bot_right = holes.centroids[order].tolist()
+        rad_top_left, rad_top_right, rad_bot_left, rad_bot_right = (
+            (holes.widths[order] / 2.0).tolist()
+        )
         
         # Draw top seam
-        p1_top = (int(top_row[0][0][0] + rad_top_left), int(top_row[0][0][1]))
-        p2_top = (int(top_row[1][0][0] - rad_top_right), int(top_row[1][0][1]))
+        p1_top = (int(top_left[0] + rad_top_left), int(top_left[1]))
+        p2_top = (int(top_right[0] - rad_top_right), int(top_right[1]))
         cv2.line(annotated, p1_top, p2_top, (0, 255, 0), 2)
         mid_top = (int((p1_top[0] + p2_top[0]) / 2), int(p1_top[1] - 10))
-        cv2.putText(annotated, f"{len_top:.2f}", mid_top, cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5, (0, 255, 0), 1)
+        cv2.putText(annotated, f"{len_top:.2f}", mid_top, _FONT, 0.5, (0, 255, 0), 1)
         
         # Draw bottom seam
-        p1_bot = (int(bottom_row[0][0][0] + rad_bot_left), int(bottom_row[0][0][1]))
-        p2_bot = (int(bottom_row[1][0][0] - rad_bot_right), int(bottom_row[1][0][1]))
+        p1_bot = (int(bot_left[0] + rad_bot_left), int(bot_left[1]))
+        p2_bot = (int(bot_right[0] - rad_bot_right), int(bot_right[1]))
         cv2.line(annotated, p1_bot, p2_bot, (0, 255, 0), 2)
         mid_bot = (int((p1_bot[0] + p2_bot[0]) / 2), int(p1_bot[1] + 15))
-        cv2.putText(annotated, f"{len_bottom:.2f}", mid_bot, cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5, (0, 255, 0), 1)
+        cv2.putText(annotated, f"{len_bottom:.2f}", mid_bot, _FONT, 0.5, (0, 255, 0), 1)
         
         # Draw left seam
-        p1_left = (int(top_row[0][0][0]), int(top_row[0][0][1] + rad_top_left))
-        p2_left = (int(bottom_row[0][0][0]), int(bottom_row[0][0][1] - rad_bot_left))
+        p1_left = (int(top_left[0]), int(top_left[1] + rad_top_left))
+        p2_left = (int(bot_left[0]), int(bot_left[1] - rad_bot_left))
         cv2.line(annotated, p1_left, p2_left, (0, 255, 0), 2)
         mid_left = (int(p1_left[0] - 50), int((p1_left[1] + p2_left[1]) / 2))
-        cv2.putText(annotated, f"{len_left:.2f}", mid_left, cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5, (0, 255, 0), 1)
+        cv2.putText(annotated, f"{len_left:.2f}", mid_left, _FONT, 0.5, (0, 255, 0), 1)
         
         # Draw right seam
-        p1_right = (int(top_row[1][0][0]), int(top_row[1][0][1] + rad_top_right))
-        p2_right = (int(bottom_row[1][0][0]), int(bottom_row[1][0][1] - rad_bot_right))
+        p1_right = (int(top_right[0]), int(top_right[1] + rad_top_right))
+        p2_right = (int(bot_right[0]), int(bot_right[1] - rad_bot_right))
         cv2.line(annotated, p1_right, p2_right, (0, 255, 0), 2)
         mid_right = (int(p1_right[0] + 10), int((p1_right[1] + p2_right[1]) / 2))
-        cv2.putText(annotated, f"{len_right:.2f}", mid_right, cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5, (0, 255, 0), 1)
+        cv2.putText(annotated, f"{len_right:.2f}", mid_right, _FONT, 0.5, (0, 255, 0), 1)
     
     # Add status and defect annotations
     color = (0, 0, 255) if status == "NOK" else (0, 255, 0)
@@ -195,13 +356,32 @@ def annotate_image(img: np.ndarray, holes: List[Tuple[Tuple[int, int], float, fl
     
     if status == "NOK":
         if len(holes) < 4:
-            cv2.putText(annotated, "Hole Missing", (20, y_offset), cv2.FONT_HERSHEY_SIMPLEX,
-                        1.0, (0, 0, 255), 2)
+            cv2.putText(annotated, "Hole Missing", (20, y_offset), _FONT, 1.0, (0, 0, 255), 2)
             y_offset += 30
         
         if spatter_count > 5:
-            cv2.putText(annotated, f"Spatter: {spatter_count}", (20, y_offset), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
+            cv2.putText(annotated, f"Spatter: {spatter_count}", (20, y_offset),
+                        _FONT, 1.0, (0, 0, 255), 2)
             y_offset += 30
     
-    return annotated
\ No newline at end of file
+    return annotated
+
+def annotate_defects(img: np.ndarray, defects: List[str]) -> np.ndarray:
+    """
+    List defect descriptions in the top-left corner of an image.
+    
+    Used for parts that cannot be measured (missing part or holes).
+    
+    Args:
+        img: Image to annotate (modified in place)
+        defects: Defect descriptions, one per line
+        
+    Returns:
+        Annotated image
+    """
+    y_offset = 30
+    for defect in defects:
+        cv2.putText(img, defect, (20, y_offset), _FONT, 1.0, (0, 0, 255), 2)
+        y_offset += 30
+    
+    return img
@@ -5,26 +5,64 @@ This module contains the core Inspector class that orchestrates the inspection
 workflow, including image processing, measurement recording, and file management.
 """
 
+import csv
 import cv2
 import numpy as np
-import pandas as pd
 import os
-import datetime
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import List, Tuple, Dict, Optional
 
 from image_processing.detection import (
     detect_part_presence, 
     detect_holes, 
     detect_spatter,
+    arrange_holes,
     calculate_seam_lengths,
-    annotate_image
+    annotate_image,
+    annotate_defects
 )
 from camera.camera_controller import CameraController
 from utils.file_utils import get_next_filename, ensure_directory_exists
-from utils.logger import setup_logger
+from utils.logger import setup_logger, LazyFormat
 from config import Config
 
 
+# Shared workers for the independent detection passes. OpenCV releases the
+# GIL inside its calls, so hole and spatter detection overlap on a frame.
+_detection_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="detection")
+
+# Measurement slots (Value1-12, zero based) for the width and height of the
+# four holes in x order; slots 4, 5, 10 and 11 hold the seam lengths
+_HOLE_WIDTH_SLOTS = np.array([0, 2, 6, 8])
+_HOLE_HEIGHT_SLOTS = np.array([1, 3, 7, 9])
+
+
+def _write_jpeg(path: str, img: np.ndarray) -> None:
+    """
+    Encode an image as JPEG and write it to disk.
+    
+    On failure the file reserved by get_next_filename is removed, so no
+    empty or truncated image is left behind.
+    
+    Args:
+        path: Output file path
+        img: Image to save
+    """
+    try:
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), Config.JPEG_QUALITY])
+        if not ok:
+            raise IOError(f"Could not encode image for {path}")
+        with open(path, 'wb', buffering=1 << 20) as f:
+            f.write(buf.tobytes())
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+
+
 class Inspector:
     """
     Encapsulates the inspection workflow: counters, CSV writing and image saving.
@@ -55,25 +93,45 @@ class Inspector:
         self.csv_path = os.path.join(self.order_dir, f"{order_number}.csv")
         self._initialize_csv()
         
+        # Keep the CSV open for appending; rows are numbered from the existing count
+        with open(self.csv_path, newline="") as f:
+            self._next_number = max(sum(1 for _ in f) - 1, 0) + 1
+        self._csv_fh = open(self.csv_path, "a", newline="", buffering=1 << 16)
+        self._csv_writer = csv.writer(self._csv_fh, lineterminator="\n")
+        
+        # Date and time strings for the CSV, reformatted once per second
+        self._last_sec: Optional[int] = None
+        self._last_date = ""
+        self._last_time = ""
+        
+        # Scratch array for cleaning and rounding measurements for the CSV
+        self._csv_values = np.zeros(12, dtype=np.float64)
+        
         # Set up logging
         self.logger = setup_logger(self.order_dir)
         
         # Initialize camera controller
         self.camera = CameraController()
         
-        self.logger.info(f"Inspector initialized for order {order_number} by user {user}")
+        # Reusable annotation buffer, sized on the first frame, and the
+        # background write that may still be reading it
+        self._scratch: Optional[np.ndarray] = None
+        self._scratch_write: Optional[Future] = None
+        
+        # Annotated images are encoded and written in the background
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-io")
+        self._pending_writes = []
+        
+        self.logger.info("Inspector initialized for order %s by user %s", order_number, user)
     
     def _initialize_csv(self) -> None:
         """Initialize CSV file with headers if it doesn't exist."""
         if not os.path.exists(self.csv_path):
-            header = (
-                ["Number", "OK/NOK", "Ordernumber", "Counter", "Date", "Time"]
-                + [f"Value{i}" for i in range(1, 13)]
-                + ["User"]
-            )
-            pd.DataFrame(columns=header).to_csv(self.csv_path, index=False)
+            with open(self.csv_path, "w", newline="") as f:
+                csv.writer(f, lineterminator="\n").writerow(Config.CSV_HEADERS)
     
-    def process_and_save(self, img: np.ndarray, part_number: str, cam_id: int = 1) -> Dict:
+    def process_and_save(self, img: np.ndarray, part_number: str, cam_id: int = 1,
+                         gray: Optional[np.ndarray] = None) -> Dict:
         """
         Analyse an image, update counters, annotate and save results.
         
@@ -81,85 +139,28 @@ class Inspector:
             img: Input image to process
             part_number: Part identification number
             cam_id: Camera ID (default: 1)
+            gray: Grayscale plane of img, if the caller already has it
             
         Returns:
             Dictionary containing processing results and measurements
         """
-        # Convert to grayscale for analysis
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
         # Initialize processing results
         result = {
             'part_number': part_number,
             'cam_id': cam_id,
             'status': 'OK',
-            'measurements': [0.0] * 12,
+            'measurements': np.zeros(12, dtype=np.float64),
             'defects': [],
-            'timestamp': datetime.datetime.now()
+            'timestamp_ns': time.time_ns()
         }
         
-        # Check if part is present
-        part_present = detect_part_presence(gray, Config.PART_DETECTION_THRESHOLD)
-        
-        if not part_present:
-            result['status'] = 'NOK'
-            result['defects'].append('Part Missing')
-            self.logger.warning(f"Part {part_number}: Part missing detected")
-        else:
-            # Detect holes and measure diameters
-            holes = detect_holes(gray)
-            holes = sorted(holes, key=lambda h: h[0][0])  # Sort by x-coordinate
-            
-            # Record hole measurements
-            for idx, hole in enumerate(holes[:4]):  # Maximum 4 holes expected
-                _, width, height = hole
-                if idx < 2:
-                    # Top row holes
-                    result['measurements'][idx * 2] = width
-                    result['measurements'][idx * 2 + 1] = height
-                else:
-                    # Bottom row holes
-                    result['measurements'][6 + (idx - 2) * 2] = width
-                    result['measurements'][6 + (idx - 2) * 2 + 1] = height
-            
-            # Check for missing holes
-            if len(holes) < Config.EXPECTED_HOLE_COUNT:
-                result['status'] = 'NOK'
-                result['defects'].append(f'Missing holes: expected {Config.EXPECTED_HOLE_COUNT}, found {len(holes)}')
-                self.logger.warning(f"Part {part_number}: Missing holes detected")
-            
-            # Calculate weld seam lengths
-            if len(holes) >= 4:
-                seam_lengths = calculate_seam_lengths(holes)
-                len_top, len_bottom, len_left, len_right = seam_lengths
-                
-                result['measurements'][4] = len_top     # Top seam
-                result['measurements'][5] = len_bottom  # Bottom seam
-                result['measurements'][10] = len_left   # Left seam
-                result['measurements'][11] = len_right  # Right seam
-            else:
-                result['status'] = 'NOK'
-                result['defects'].append('Insufficient holes for weld measurement')
-                seam_lengths = (0.0, 0.0, 0.0, 0.0)
-            
-            # Detect weld spatter
-            spatter_count = detect_spatter(gray)
-            if spatter_count > Config.MAX_SPATTER_COUNT:
-                result['status'] = 'NOK'
-                result['defects'].append(f'Excessive spatter: {spatter_count} detected')
-                self.logger.warning(f"Part {part_number}: Excessive spatter detected ({spatter_count})")
-        
-        # Create annotated image
-        if part_present and len(holes) >= 4:
-            annotated = annotate_image(img, holes, seam_lengths, spatter_count, result['status'])
+        # Check if part is present; the green channel view tracks luminance
+        # closely enough without converting the whole frame first
+        presence_src = gray if gray is not None else img[:, :, 1]
+        if detect_part_presence(presence_src, Config.PART_DETECTION_THRESHOLD):
+            annotated = self._analyze_present(img, gray, result)
         else:
-            annotated = img.copy()
-            # Add defect annotations
-            y_offset = 30
-            for defect in result['defects']:
-                cv2.putText(annotated, defect, (20, y_offset), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-                y_offset += 30
+            annotated = self._analyze_missing(img, result)
         
         # Update counters and save results
         if result['status'] == 'OK':
@@ -174,19 +175,126 @@ class Inspector:
             self.order_dir, result['status'], self.order_number, 
             part_number, counter_val, cam_id
         )
-        cv2.imwrite(output_path, annotated)
+        self._queue_image_write(output_path, annotated)
         result['image_path'] = output_path
         
         # Save measurement data to CSV
         self._save_to_csv(result, counter_val)
         
         # Log processing summary
-        self.logger.info(f"Processed part {part_number} (CAM{cam_id}) -> Status: {result['status']}")
+        self.logger.info("Processed part %s (CAM%s) -> Status: %s", part_number, cam_id, result['status'])
         if result['defects']:
-            self.logger.info(f"Defects: {', '.join(result['defects'])}")
+            self.logger.info("Defects: %s", LazyFormat(lambda: ', '.join(result['defects'])))
         
         return result
     
+    def _annotation_canvas(self, img: np.ndarray) -> np.ndarray:
+        """
+        Copy an image into the reusable scratch buffer for annotation.
+        
+        A fresh buffer is allocated instead if the previous one is still
+        queued for encoding.
+        
+        Args:
+            img: Image to copy
+            
+        Returns:
+            Scratch buffer holding a copy of img
+        """
+        busy = self._scratch_write is not None and not self._scratch_write.done()
+        if busy or self._scratch is None or self._scratch.shape != img.shape:
+            self._scratch = np.empty_like(img)
+            self._scratch_write = None
+        np.copyto(self._scratch, img)
+        return self._scratch
+    
+    def _analyze_missing(self, img: np.ndarray, result: Dict) -> np.ndarray:
+        """
+        Record a missing part; no further image analysis is done.
+        
+        Args:
+            img: Input image
+            result: Processing result dictionary, updated in place
+            
+        Returns:
+            Annotated image
+        """
+        result['status'] = 'NOK'
+        result['defects'].append('Part Missing')
+        self.logger.warning("Part %s: Part missing detected", result['part_number'])
+        
+        return annotate_defects(self._annotation_canvas(img), result['defects'])
+    
+    def _analyze_present(self, img: np.ndarray, gray: Optional[np.ndarray],
+                         result: Dict) -> np.ndarray:
+        """
+        Measure holes, weld seams and spatter on a present part.
+        
+        Args:
+            img: Input image
+            gray: Grayscale plane of img, None to convert here
+            result: Processing result dictionary, updated in place
+            
+        Returns:
+            Annotated image
+        """
+        part_number = result['part_number']
+        
+        # Convert to grayscale for analysis
+        if gray is None:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+        # Run hole and spatter detection concurrently on the same frame
+        holes_future = _detection_pool.submit(detect_holes, gray)
+        spatter_future = _detection_pool.submit(detect_spatter, gray)
+        
+        # Detect holes and measure diameters
+        holes = holes_future.result()
+        holes = holes.take(np.argsort(holes.centroids[:, 0], kind="stable"))  # Sort by x-coordinate
+        
+        # Record hole measurements
+        n = min(len(holes), 4)  # Maximum 4 holes expected
+        result['measurements'][_HOLE_WIDTH_SLOTS[:n]] = holes.widths[:n]
+        result['measurements'][_HOLE_HEIGHT_SLOTS[:n]] = holes.heights[:n]
+        
+        # Check for missing holes
+        if len(holes) < Config.EXPECTED_HOLE_COUNT:
+            result['status'] = 'NOK'
+            result['defects'].append(f'Missing holes: expected {Config.EXPECTED_HOLE_COUNT}, found {len(holes)}')
+            self.logger.warning("Part %s: Missing holes detected", part_number)
+        
+        # Calculate weld seam lengths
+        if len(holes) >= 4:
+            # Arrange once; seam measurement and annotation share the order
+            order = arrange_holes(holes)
+            seam_lengths = calculate_seam_lengths(holes, order)
+            len_top, len_bottom, len_left, len_right = seam_lengths
+            
+            result['measurements'][4] = len_top     # Top seam
+            result['measurements'][5] = len_bottom  # Bottom seam
+            result['measurements'][10] = len_left   # Left seam
+            result['measurements'][11] = len_right  # Right seam
+        else:
+            result['status'] = 'NOK'
+            result['defects'].append('Insufficient holes for weld measurement')
+            seam_lengths = (0.0, 0.0, 0.0, 0.0)
+        
+        # Detect weld spatter
+        spatter_count = spatter_future.result()
+        if spatter_count > Config.MAX_SPATTER_COUNT:
+            result['status'] = 'NOK'
+            result['defects'].append(f'Excessive spatter: {spatter_count} detected')
+            self.logger.warning("Part %s: Excessive spatter detected (%d)", part_number, spatter_count)
+        
+        # Create annotated image on the scratch buffer
+        canvas = self._annotation_canvas(img)
+        if len(holes) >= 4:
+            return annotate_image(canvas, holes, seam_lengths, spatter_count,
+                                  result['status'], inplace=True, order=order)
+        
+        # Add defect annotations
+        return annotate_defects(canvas, result['defects'])
+    
     def _save_to_csv(self, result: Dict, counter_val: int) -> None:
         """
         Save measurement results to CSV file.
@@ -195,36 +303,69 @@ class Inspector:
             result: Processing result dictionary
             counter_val: Counter value for this measurement
         """
-        # Load existing CSV data
-        df_existing = pd.read_csv(self.csv_path)
-        next_number = df_existing.shape[0] + 1
-        
         # Create new row
-        now = result['timestamp']
-        date_str = now.strftime("%Y-%m-%d")
-        time_str = now.strftime("%H:%M:%S")
-        
-        row = {
-            "Number": next_number,
-            "OK/NOK": result['status'],
-            "Ordernumber": self.order_number,
-            "Counter": counter_val,
-            "Date": date_str,
-            "Time": time_str,
-        }
+        sec = result['timestamp_ns'] // 1_000_000_000
+        if sec != self._last_sec:
+            now = time.localtime(sec)
+            self._last_sec = sec
+            self._last_date = time.strftime("%Y-%m-%d", now)
+            self._last_time = time.strftime("%H:%M:%S", now)
         
-        # Add measurement values
-        for i, val in enumerate(result['measurements'], start=1):
-            try:
-                row[f"Value{i}"] = round(float(val), 2)
-            except (ValueError, TypeError):
-                row[f"Value{i}"] = 0.0
+        row = [self._next_number, result['status'], self.order_number,
+               counter_val, self._last_date, self._last_time]
         
-        row["User"] = self.user
+        # Add measurement values, with non-finite values recorded as 0.0
+        values = self._csv_values
+        np.copyto(values, result['measurements'])
+        np.nan_to_num(values, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        np.round(values, 2, out=values)
+        row.extend(values.tolist())
+        
+        row.append(self.user)
         
         # Append to CSV
-        df_new = pd.concat([df_existing, pd.DataFrame([row])], ignore_index=True)
-        df_new.to_csv(self.csv_path, index=False)
+        self._csv_writer.writerow(row)
+        self._next_number += 1
+    
+    def _queue_image_write(self, path: str, img: np.ndarray) -> None:
+        """
+        Queue an annotated image to be encoded and saved in the background.
+        
+        Args:
+            path: Output file path
+            img: Image to save; must not be modified afterwards (the scratch
+                buffer is not reused until its write has finished)
+        """
+        pending = []
+        for future in self._pending_writes:
+            if future.done():
+                future.result()  # Re-raise write errors
+            else:
+                pending.append(future)
+        future = self._io_pool.submit(_write_jpeg, path, img)
+        pending.append(future)
+        self._pending_writes = pending
+        if img is self._scratch:
+            self._scratch_write = future
+    
+    def wait_idle(self) -> None:
+        """Block until all queued image writes have reached the disk."""
+        pending, self._pending_writes = self._pending_writes, []
+        done, _ = wait(pending)
+        for future in done:
+            future.result()  # Re-raise write errors
+    
+    def close(self) -> None:
+        """Finish pending image writes, release the camera and close the CSV file."""
+        self.camera.disconnect()
+        self._io_pool.shutdown(wait=True)
+        if not self._csv_fh.closed:
+            self._csv_fh.close()
+    
+    def __del__(self) -> None:
+        """Make sure buffered CSV rows reach the disk."""
+        if hasattr(self, 'camera') and hasattr(self, '_io_pool'):
+            self.close()
     
     def get_statistics(self) -> Dict:
         """
@@ -253,11 +394,11 @@ class Inspector:
         Returns:
             Processing result dictionary
         """
-        img = self.camera.capture_image()
+        img, gray = self.camera.capture_image(with_gray=True)
         if img is not None:
-            return self.process_and_save(img, part_number, cam_id)
+            return self.process_and_save(img, part_number, cam_id, gray)
         else:
-            self.logger.error(f"Failed to capture image for part {part_number}")
+            self.logger.error("Failed to capture image for part %s", part_number)
             return {'status': 'ERROR', 'message': 'Image capture failed'}
 
 
@@ -291,6 +432,9 @@ def main():
         print(f"  Image saved: {result['image_path']}")
         print()
     
+    inspector.wait_idle()
+    inspector.close()
+    
     # Display final statistics
     stats = inspector.get_statistics()
     print("Final Statistics:")
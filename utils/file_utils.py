@@ -5,22 +5,38 @@ This module provides file management functions including directory creation,
 filename generation with non-overwrite logic, and file operations.
 """
 
+import heapq
 import os
-from typing import List
+from typing import Dict, List, Set
+
+
+# Directories already created or confirmed by ensure_directory_exists
+_ENSURED_DIRECTORIES: Set[str] = set()
+
+# Names already taken in each output directory, seeded from one listdir()
+_DIRECTORY_NAMES: Dict[str, Set[str]] = {}
 
 
 def ensure_directory_exists(directory_path: str) -> bool:
     """
     Create directory if it doesn't exist.
     
+    Directories confirmed once are remembered, so repeated calls for the
+    same path make no syscalls.
+    
     Args:
         directory_path: Path to directory to create
         
     Returns:
         True if directory exists or was created successfully, False otherwise
     """
+    path = os.path.abspath(directory_path)
+    if path in _ENSURED_DIRECTORIES:
+        return True
+    
     try:
-        os.makedirs(directory_path, exist_ok=True)
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRECTORIES.add(path)
         return True
     except OSError as e:
         print(f"Error creating directory {directory_path}: {e}")
@@ -47,28 +63,52 @@ def get_next_filename(
         cam_id: Camera ID
         
     Returns:
-        Complete file path that doesn't exist yet
+        Complete file path, reserved as an empty file so it is not reused
     """
     # Generate base filename according to specification
     base_name = f"{status}_{order_number}_{part_number}Count{counter}_CAM{cam_id}.jpg"
-    full_path = os.path.join(directory, base_name)
-    
-    # If file doesn't exist, return it
-    if not os.path.exists(full_path):
-        return full_path
-    
-    # If file exists, add suffix to make it unique
     name_without_ext = os.path.splitext(base_name)[0]
-    suffix = 1
     
+    taken = _DIRECTORY_NAMES.get(directory)
+    if taken is None:
+        try:
+            taken = set(os.listdir(directory))
+        except OSError:
+            taken = set()
+        _DIRECTORY_NAMES[directory] = taken
+    
+    # Try the base name first, then add a suffix to make it unique
+    candidate = base_name
+    suffix = 0
     while True:
-        new_name = f"{name_without_ext}_{suffix}.jpg"
-        new_path = os.path.join(directory, new_name)
-        
-        if not os.path.exists(new_path):
-            return new_path
+        if candidate not in taken:
+            taken.add(candidate)
+            if _reserve_file(os.path.join(directory, candidate)):
+                return os.path.join(directory, candidate)
         
         suffix += 1
+        candidate = f"{name_without_ext}_{suffix}.jpg"
+
+
+def _reserve_file(path: str) -> bool:
+    """
+    Atomically create an empty file so no other writer can claim the name.
+    
+    Args:
+        path: Path to reserve
+        
+    Returns:
+        True if the file was created, False if it already existed
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    except OSError:
+        # Leave error reporting to the actual write
+        return True
+    os.close(fd)
+    return True
 
 
 def get_file_size(file_path: str) -> int:
@@ -122,12 +162,12 @@ def list_files_by_extension(directory: str, extension: str) -> list:
         if not os.path.exists(directory):
             return []
         
-        files = []
-        for filename in os.listdir(directory):
-            if filename.lower().endswith(extension.lower()):
-                files.append(os.path.join(directory, filename))
-        
-        return sorted(files)
+        ext = extension.lower()
+        with os.scandir(directory) as entries:
+            return sorted(
+                entry.path for entry in entries
+                if entry.name.lower().endswith(ext) and entry.is_file(follow_symlinks=False)
+            )
     except OSError as e:
         print(f"Error listing files in {directory}: {e}")
         return []
@@ -145,21 +185,27 @@ def clean_old_files(directory: str, max_files: int = 1000) -> int:
         Number of files deleted
     """
     try:
-        # Get all image files sorted by modification time
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
+        if not os.path.exists(directory):
+            return 0
+        
+        # Collect image files with their modification times in one pass
+        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
         all_files = []
         
-        for ext in image_extensions:
-            files = list_files_by_extension(directory, ext)
-            all_files.extend(files)
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (entry.name.lower().endswith(image_extensions)
+                        and entry.is_file(follow_symlinks=False)):
+                    all_files.append((entry.stat(follow_symlinks=False).st_mtime, entry.path))
         
-        # Sort by modification time (oldest first)
-        all_files.sort(key=lambda x: os.path.getmtime(x))
+        # Delete oldest files if we exceed the limit; only the excess needs
+        # ordering by modification time
+        excess = len(all_files) - max_files
+        if excess <= 0:
+            return 0
         
-        # Delete oldest files if we exceed the limit
         deleted_count = 0
-        while len(all_files) > max_files:
-            oldest_file = all_files.pop(0)
+        for _, oldest_file in heapq.nsmallest(excess, all_files):
             if delete_file(oldest_file):
                 deleted_count += 1
         
@@ -194,12 +240,55 @@ def backup_csv_file(csv_path: str) -> str:
         backup_filename = f"{name}_backup_{timestamp}{ext}"
         backup_path = os.path.join(directory, backup_filename)
         
-        # Copy file
+        # Copy file, sharing the data blocks when the filesystem supports it
         import shutil
-        shutil.copy2(csv_path, backup_path)
+        if _clone_file(csv_path, backup_path):
+            shutil.copystat(csv_path, backup_path)
+        else:
+            shutil.copy2(csv_path, backup_path)
         
         return backup_path
         
     except Exception as e:
         print(f"Error creating backup of {csv_path}: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+
+# Linux FICLONE ioctl request number (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+
+def _clone_file(src_path: str, dst_path: str) -> bool:
+    """
+    Create dst_path as a copy-on-write clone (reflink) of src_path.
+    
+    The clone is a separate file that shares the source's data blocks, so
+    creating it costs no data copying, and later appends to the source do not
+    change it. Supported on e.g. Btrfs and XFS.
+    
+    Args:
+        src_path: File to clone
+        dst_path: Path of the new file
+        
+    Returns:
+        True if the clone was created, False if the platform or filesystem
+        does not support it (no file is left behind)
+    """
+    try:
+        import fcntl
+    except ImportError:  # Not available on Windows
+        return False
+    
+    try:
+        with open(src_path, 'rb') as src, open(dst_path, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+                return True
+            except OSError:
+                pass
+    except OSError:
+        return False
+    
+    # Clone not supported here; remove the empty destination
+    os.remove(dst_path)
+    return False
@@ -5,10 +5,180 @@ This module provides logging configuration and utilities for tracking
 inspection operations, errors, and system events.
 """
 
+import atexit
+import functools
 import logging
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+
+class LazyFormat:
+    """
+    Log argument whose value is computed only if the record is formatted.
+    
+    Wrap expensive message arguments (joins, conversions) so that records
+    filtered out by level never pay for them:
+    
+        logger.debug("Defects: %s", LazyFormat(lambda: ', '.join(defects)))
+    """
+    
+    __slots__ = ('_fn',)
+    
+    def __init__(self, fn: Callable[[], Any]):
+        """
+        Initialize the lazy argument.
+        
+        Args:
+            fn: Zero-argument callable producing the value to log
+        """
+        self._fn = fn
+    
+    def __str__(self) -> str:
+        return str(self._fn())
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that writes through a large stdio buffer.
+    
+    The stock handler flushes after every record, i.e. one write() per
+    line. Here records collect in a 64 KiB buffer that is written when
+    full, on WARNING or worse, at rollover and on close (logging.shutdown()
+    flushes it at exit). Up to one buffer of INFO/DEBUG records can be lost
+    if the process is killed.
+    """
+    
+    buffer_size = 1 << 16
+    
+    def _open(self):
+        # FileHandler only has an errors attribute from Python 3.9 on
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                      encoding=self.encoding, errors=getattr(self, "errors", None))
+        # Track the size here: tell() on a text stream flushes its buffer,
+        # so the base class's shouldRollover() would write every record
+        self._size = stream.tell()
+        return stream
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record, flushing only for warnings and errors."""
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and 0 < self._size and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._size += len(msg)  # Characters; close enough for rotation
+            if record.levelno >= logging.WARNING:
+                self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class AsyncRotatingFileHandler(BufferedRotatingFileHandler):
+    """
+    Rotating file handler that renumbers backup files on a worker thread.
+    
+    At rollover the full log file is renamed aside and a fresh file opened
+    straight away, so logging continues while the backups are shifted in
+    the background. Rollovers are processed in order by a single worker;
+    once that worker is shut down, backups are shifted synchronously.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._rotation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-rotation")
+        self._rollovers = 0
+    
+    def doRollover(self) -> None:
+        """Swap in a fresh log file and queue the backup shuffle."""
+        # Called from emit() with the handler lock held, so no record can
+        # be written while the files are swapped
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        
+        if self.backupCount > 0 and os.path.exists(self.baseFilename):
+            self._rollovers += 1
+            pending = f"{self.baseFilename}.rotating-{os.getpid()}-{self._rollovers}"
+            os.replace(self.baseFilename, pending)
+            try:
+                self._rotation_pool.submit(self._shift_backups, pending)
+            except RuntimeError:
+                # The pool is shut down (handler closed, or interpreter exit
+                # during the final flush), so shift the backups right here
+                self._shift_backups(pending)
+        
+        if not self.delay:
+            self.stream = self._open()
+    
+    def _shift_backups(self, pending: str) -> None:
+        """
+        Renumber existing backups and move the rotated file into place.
+        
+        Failures are reported through handleError, as a failed rollover in
+        the stock handler would be; the rotated file then stays under its
+        temporary name.
+        
+        Args:
+            pending: Temporary name of the file that was just rotated out
+        """
+        try:
+            for i in range(self.backupCount - 1, 0, -1):
+                source = self.rotation_filename(f"{self.baseFilename}.{i}")
+                dest = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+                if os.path.exists(source):
+                    os.replace(source, dest)
+            
+            dest = self.rotation_filename(f"{self.baseFilename}.1")
+            if os.path.exists(dest):
+                os.remove(dest)
+            self.rotate(pending, dest)
+        except Exception:
+            # Usually runs on the rotation worker, outside any emit() call,
+            # so describe the failed rollover in a record of its own
+            self.handleError(logging.makeLogRecord({
+                'msg': 'Could not move rotated log file %s into the backups',
+                'args': (pending,),
+            }))
+    
+    def close(self) -> None:
+        """Close the log file after queued rotations have finished."""
+        super().close()
+        self._rotation_pool.shutdown(wait=True)
+
+
+def _fmt_measurements(measurements) -> str:
+    """
+    Format measurement values compactly, summarizing long sequences.
+    
+    Args:
+        measurements: List or array of measurement values
+        
+    Returns:
+        str() for up to 16 values, otherwise an abbreviated array string
+    """
+    if hasattr(measurements, '__len__') and len(measurements) > 16:
+        return np.array2string(np.asarray(measurements), threshold=16, precision=3)
+    return str(measurements)
+
+
+def _join(items: list) -> LazyFormat:
+    """Lazily join a list of strings with ', ' for a log message."""
+    return LazyFormat(lambda: ', '.join(items))
 
 
 def setup_logger(
@@ -20,21 +190,98 @@ def setup_logger(
     """
     Set up logging configuration for the inspection system.
     
+    Repeated calls with the same arguments (on the same day) return the
+    logger as configured, without reopening its handlers.
+    
+    File output is batched: records pass through the log queue, a
+    MemoryHandler holding up to 1024 records and the file handler's 64 KiB
+    buffer. Any WARNING or worse flushes all of it to disk. INFO/DEBUG
+    records can otherwise lag behind (e.g. in tail -f), and a hard kill
+    can lose up to that combined amount; stop_logger() at exit writes
+    everything out.
+    
     Args:
         log_dir: Directory to store log files
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         max_log_size: Maximum log file size in bytes before rotation
         backup_count: Number of backup log files to keep
         
+    Returns:
+        Configured logger instance
+    """
+    # Generate log filename with date
+    date_str = _log_date()
+    log_filename = os.path.join(os.path.abspath(log_dir), f"inspection_{date_str}.log")
+    
+    with _configure_lock:
+        return _configure_logger(log_filename, log_level, max_log_size, backup_count)
+
+
+# Local date used in log file names and the time it stops being valid
+_date_cache: Tuple[str, float] = ("", 0.0)
+
+
+def _log_date() -> str:
+    """
+    Return today's local date as YYYYMMDD, formatted once per day.
+    
+    Returns:
+        Date string for the log file name
+    """
+    global _date_cache
+    date_str, expires = _date_cache
+    now = time.time()
+    if now >= expires:
+        local = time.localtime(now)
+        date_str = time.strftime("%Y%m%d", local)
+        # Valid until the next local midnight (mktime normalizes the day)
+        expires = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1,
+                               0, 0, 0, 0, 0, -1))
+        _date_cache = (date_str, expires)
+    return date_str
+
+
+# logging's own source path; clearing logging._srcfile skips findCaller()
+_LOGGING_SRCFILE = logging._srcfile
+
+# Serializes (re)configuration so concurrent setup_logger calls cannot
+# attach duplicate handlers or tear down each other's listener
+_configure_lock = threading.Lock()
+
+# Background listener that writes records queued by the logger
+_listener: Optional[QueueListener] = None
+
+
+# There is a single InspectionSystem logger, so only its current
+# configuration is worth remembering; other arguments reconfigure it
+@functools.lru_cache(maxsize=1)
+def _configure_logger(
+    log_filename: str,
+    log_level: int,
+    max_log_size: int,
+    backup_count: int
+) -> logging.Logger:
+    """
+    Attach fresh handlers to the InspectionSystem logger.
+    
+    Args:
+        log_filename: Path of the log file
+        log_level: Logging level
+        max_log_size: Maximum log file size in bytes before rotation
+        backup_count: Number of backup log files to keep
+        
     Returns:
         Configured logger instance
     """
     # Create log directory if it doesn't exist
-    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
     
-    # Generate log filename with date
-    date_str = datetime.now().strftime("%Y%m%d")
-    log_filename = os.path.join(log_dir, f"inspection_{date_str}.log")
+    # None of the formatters use thread, process or task fields, so don't
+    # have every LogRecord look them up
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.logAsyncioTasks = False  # Python 3.12+; ignored before
     
     # Create logger
     logger = logging.getLogger('InspectionSystem')
@@ -43,12 +290,20 @@ def setup_logger(
     # Remove existing handlers to avoid duplication
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        handler.close()
+    _stop_listener()
+    
+    # Call sites (funcName:lineno) cost a stack walk per record, so they are
+    # only recorded when INSPECTION_LOG_DEBUG is set
+    log_call_sites = bool(os.environ.get("INSPECTION_LOG_DEBUG"))
+    logging._srcfile = _LOGGING_SRCFILE if log_call_sites else None
     
     # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if log_call_sites:
+        detailed_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+    else:
+        detailed_fmt = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    detailed_formatter = logging.Formatter(detailed_fmt, datefmt='%Y-%m-%d %H:%M:%S')
     
     simple_formatter = logging.Formatter(
         '%(asctime)s - %(levelname)s - %(message)s',
@@ -56,8 +311,7 @@ def setup_logger(
     )
     
     # File handler with rotation
-    from logging.handlers import RotatingFileHandler
-    file_handler = RotatingFileHandler(
+    file_handler = AsyncRotatingFileHandler(
         log_filename,
         maxBytes=max_log_size,
         backupCount=backup_count,
@@ -65,17 +319,74 @@ def setup_logger(
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
+    # Buffer file records and write them in batches; warnings and errors
+    # flush at once, matching the file handler's own flush level
+    buffer_handler = MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.WARNING,
+        target=file_handler,
+        flushOnClose=True
+    )
+    buffer_handler.setLevel(logging.DEBUG)
+    
+    handlers = [buffer_handler]
+    
+    # Console handler; unattended runs (stderr not a terminal) only get
+    # warnings there, and INSPECTION_NO_CONSOLE disables it entirely
+    if not os.environ.get("INSPECTION_NO_CONSOLE"):
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO if sys.stderr.isatty() else logging.WARNING)
+        console_handler.setFormatter(simple_formatter)
+        handlers.append(console_handler)
+    
+    # The logger only enqueues records; a listener thread does the I/O
+    global _listener
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     
     return logger
 
 
+def _stop_listener() -> None:
+    """Write out all queued records and close the listener's handlers."""
+    global _listener
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    for handler in _listener.handlers:
+        # MemoryHandler.close() flushes its buffer and then drops its target,
+        # so keep a reference to close the file handler behind it
+        target = handler.target if isinstance(handler, MemoryHandler) else None
+        handler.close()
+        if target is not None:
+            target.flush()
+            target.close()
+    _listener = None
+
+
+def stop_logger() -> None:
+    """
+    Flush and close the InspectionSystem log handlers.
+    
+    Runs automatically at interpreter exit; a later setup_logger call
+    configures the logger again.
+    """
+    with _configure_lock:
+        logger = logging.getLogger('InspectionSystem')
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+            handler.close()
+        _stop_listener()
+        _configure_logger.cache_clear()
+
+
+atexit.register(stop_logger)
+
+
 def log_inspection_start(logger: logging.Logger, order_number: str, user: str) -> None:
     """
     Log the start of an inspection session.
@@ -85,10 +396,11 @@ def log_inspection_start(logger: logging.Logger, order_number: str, user: str) -
         order_number: Production order number
         user: User name
     """
-    logger.info(f"=== INSPECTION SESSION STARTED ===")
-    logger.info(f"Order Number: {order_number}")
-    logger.info(f"User: {user}")
-    logger.info(f"Timestamp: {datetime.now().isoformat()}")
+    logger.info("=== INSPECTION SESSION STARTED ===")
+    logger.info("Order Number: %s", order_number)
+    logger.info("User: %s", user)
+    # The time is taken now; only its string conversion is deferred
+    logger.info("Timestamp: %s", LazyFormat(datetime.now().isoformat))
 
 
 def log_inspection_result(
@@ -108,11 +420,28 @@ def log_inspection_result(
         measurements: List of measurement values
         defects: List of detected defects (if any)
     """
-    logger.info(f"Part {part_number} inspection completed: {status}")
-    logger.debug(f"Measurements: {measurements}")
+    logger.info("Part %s inspection completed: %s", part_number, status)
     
-    if defects:
-        logger.warning(f"Defects detected in part {part_number}: {', '.join(defects)}")
+    # Skip building the call (and lazy wrappers) for filtered levels
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Measurements: %s", LazyFormat(lambda: _fmt_measurements(measurements)))
+    
+    if defects and logger.isEnabledFor(logging.WARNING):
+        logger.warning("Defects detected in part %s: %s", part_number, _join(defects))
+
+
+@functools.lru_cache(maxsize=64)
+def _prefix_fmt(tag: str) -> str:
+    """
+    Build the "[TAG] message" format string for an event or error type.
+    
+    Args:
+        tag: Event or error type
+        
+    Returns:
+        Format string taking the message as its only argument
+    """
+    return "[" + tag.replace("%", "%%") + "] %s"
 
 
 def log_system_event(logger: logging.Logger, event_type: str, message: str) -> None:
@@ -124,7 +453,7 @@ def log_system_event(logger: logging.Logger, event_type: str, message: str) -> N
         event_type: Type of event (CAMERA, FILE, CONFIG, etc.)
         message: Event description
     """
-    logger.info(f"[{event_type}] {message}")
+    logger.info(_prefix_fmt(event_type), message)
 
 
 def log_error(logger: logging.Logger, error_type: str, error_message: str, 
@@ -138,10 +467,28 @@ def log_error(logger: logging.Logger, error_type: str, error_message: str,
         error_message: Error description
         exception: Exception object (if available)
     """
-    logger.error(f"[{error_type}] {error_message}")
+    logger.error(_prefix_fmt(error_type), error_message)
     
     if exception:
-        logger.exception(f"Exception details: {str(exception)}")
+        logger.exception("Exception details: %s", exception)
+
+
+@functools.lru_cache(maxsize=128)
+def _metric_fmt(metric_name: str, unit: str) -> str:
+    """
+    Build the format string for one metric, taking the value as argument.
+    
+    Args:
+        metric_name: Name of the metric
+        unit: Unit of measurement (may be empty)
+        
+    Returns:
+        Format string such as "METRIC [fps]: %s Hz"
+    """
+    fmt = "METRIC [" + metric_name.replace("%", "%%") + "]: %s"
+    if unit:
+        fmt += " " + unit.replace("%", "%%")
+    return fmt
 
 
 def log_performance_metric(
@@ -159,13 +506,15 @@ def log_performance_metric(
         value: Metric value
         unit: Unit of measurement
     """
-    unit_str = f" {unit}" if unit else ""
-    logger.info(f"METRIC [{metric_name}]: {value}{unit_str}")
+    logger.info(_metric_fmt(metric_name, unit), value)
 
 
 class InspectionLogger:
     """
     Specialized logger class for inspection operations.
+    
+    All instances share the InspectionSystem logger; constructing another
+    one for the same directory reuses its handlers (see setup_logger).
     """
     
     def __init__(self, log_dir: str, order_number: str):
@@ -180,6 +529,7 @@ class InspectionLogger:
         self.logger = setup_logger(log_dir)
         self.part_count = 0
         self.session_start_time = datetime.now()
+        self._start_monotonic = time.monotonic()  # For durations
     
     def start_session(self, user: str) -> None:
         """Start logging session."""
@@ -191,25 +541,30 @@ class InspectionLogger:
         self.part_count += 1
         
         self.logger.info(
-            f"Part {self.part_count}: {part_number} -> {status} "
-            f"(processed in {processing_time:.2f}s)"
+            "Part %d: %s -> %s (processed in %.2fs)",
+            self.part_count, part_number, status, processing_time
         )
         
-        if defects:
-            self.logger.warning(f"Defects in {part_number}: {', '.join(defects)}")
+        if defects and self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning("Defects in %s: %s", part_number, _join(defects))
     
     def log_statistics(self, ok_count: int, nok_count: int) -> None:
-        """Log session statistics."""
+        """Log session statistics as a single multi-line record."""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        
         total = ok_count + nok_count
         ok_rate = (ok_count / total * 100) if total > 0 else 0
+        elapsed = time.monotonic() - self._start_monotonic
         
-        session_duration = datetime.now() - self.session_start_time
-        
-        self.logger.info(f"=== SESSION STATISTICS ===")
-        self.logger.info(f"Duration: {session_duration}")
-        self.logger.info(f"Total parts: {total}")
-        self.logger.info(f"OK parts: {ok_count} ({ok_rate:.1f}%)")
-        self.logger.info(f"NOK parts: {nok_count} ({100-ok_rate:.1f}%)")
+        report = "\n".join([
+            "=== SESSION STATISTICS ===",
+            f"Duration: {elapsed:.1f}s",
+            f"Total parts: {total}",
+            f"OK parts: {ok_count} ({ok_rate:.1f}%)",
+            f"NOK parts: {nok_count} ({100 - ok_rate:.1f}%)",
+        ])
+        self.logger.info("%s", report)
     
     def get_logger(self) -> logging.Logger:
         """Get underlying logger instance."""